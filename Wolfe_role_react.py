@@ -14,7 +14,7 @@ Commands (slash)
 
 Setup
 1) Python 3.10+
-2) pip install -U discord.py python-dotenv
+2) pip install -U discord.py python-dotenv orjson  (orjson is optional)
 3) Create a .env file next to this script containing:
    DISCORD_TOKEN=your_bot_token_here
 4) In the Discord Developer Portal:
@@ -32,20 +32,32 @@ Notes
 
 from __future__ import annotations
 import os
+import asyncio
 import json
 import re
+import signal
+import tempfile
 from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib json module
+    orjson = None
+
+load_dotenv()
+
 # ------------------ Storage ------------------
 STORAGE_FILE = "role_menus.json"
+# Set STORAGE_PRETTY=1 to write indented JSON (handy when inspecting the file)
+STORAGE_PRETTY = os.getenv("STORAGE_PRETTY", "").lower() in ("1", "true", "yes")
 
-@dataclass
+@dataclass(slots=True)
 class RoleMenuRecord:
     guild_id: int
     channel_id: int
@@ -55,24 +67,87 @@ class RoleMenuRecord:
     multi: bool = True
 
 
-def load_storage() -> Dict[str, RoleMenuRecord]:
+def load_storage() -> Dict[Tuple[int, int], RoleMenuRecord]:
     if not os.path.exists(STORAGE_FILE):
         return {}
-    with open(STORAGE_FILE, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    out: Dict[str, RoleMenuRecord] = {}
+    if orjson is not None:
+        with open(STORAGE_FILE, "rb") as f:
+            raw = orjson.loads(f.read())
+    else:
+        with open(STORAGE_FILE, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    out: Dict[Tuple[int, int], RoleMenuRecord] = {}
     for k, v in raw.items():
-        out[k] = RoleMenuRecord(**v)
+        # Keys are stored as "guild_id:message_id" in the JSON file
+        g_id, msg_id = k.split(":")
+        out[(int(g_id), int(msg_id))] = RoleMenuRecord(**v)
     return out
 
 
-def save_storage(data: Dict[str, RoleMenuRecord]):
-    serializable = {k: asdict(v) for k, v in data.items()}
-    with open(STORAGE_FILE, "w", encoding="utf-8") as f:
-        json.dump(serializable, f, indent=2)
-
-
-storage: Dict[str, RoleMenuRecord] = load_storage()
+def save_storage(data: Dict[Tuple[int, int], RoleMenuRecord]):
+    serializable = {f"{g}:{m}": asdict(v) for (g, m), v in data.items()}
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if STORAGE_PRETTY else 0
+        payload = orjson.dumps(serializable, option=option)
+    elif STORAGE_PRETTY:
+        payload = json.dumps(serializable, indent=2).encode("utf-8")
+    else:
+        payload = json.dumps(serializable, separators=(",", ":")).encode("utf-8")
+    # Write to a temp file and swap it in so a crash never leaves a truncated file
+    # (unique name in the same directory, so concurrent writers never share it)
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(STORAGE_FILE)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, STORAGE_FILE)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+async def save_storage_async(data: Dict[Tuple[int, int], RoleMenuRecord]):
+    # Offload the blocking file write so the event loop keeps running
+    await asyncio.to_thread(save_storage, data)
+
+
+storage: Dict[Tuple[int, int], RoleMenuRecord] = load_storage()
+
+# Debounced writer: mutations set the flag, a background task coalesces
+# bursts of changes into a single write.
+SAVE_DEBOUNCE_SECONDS = 0.5
+SAVE_RETRY_MAX_SECONDS = 60.0
+_dirty = asyncio.Event()
+_writer: Optional[asyncio.Task] = None
+# The save currently running in a worker thread, if any
+_saving: Optional[asyncio.Task] = None
+
+
+def mark_storage_dirty():
+    _dirty.set()
+
+
+async def _writer_task():
+    global _saving
+    delay = SAVE_DEBOUNCE_SECONDS
+    while True:
+        await _dirty.wait()
+        await asyncio.sleep(delay)
+        _dirty.clear()
+        _saving = asyncio.create_task(save_storage_async(dict(storage)))
+        try:
+            # Shielded so cancelling the writer never abandons a half-done save
+            await asyncio.shield(_saving)
+        except Exception as e:
+            print(f"Saving role menus failed: {e}")
+            _dirty.set()  # retry, backing off while the failure persists
+            delay = min(delay * 2, SAVE_RETRY_MAX_SECONDS)
+        else:
+            delay = SAVE_DEBOUNCE_SECONDS
 
 # ------------------ UI Components ------------------
 class RolesSelect(discord.ui.Select):
@@ -89,6 +164,7 @@ class RolesSelect(discord.ui.Select):
         )
         self._roles = roles
         self._multi = multi
+        self._menu_role_ids = frozenset(role.id for role in roles)
 
     async def callback(self, interaction: discord.Interaction):
         assert interaction.user is not None
@@ -99,14 +175,16 @@ class RolesSelect(discord.ui.Select):
             )
             return
 
-        # Roles managed by this menu
-        menu_role_ids = {int(v) for v in [o.value for o in self.options]}
         selected_ids = {int(v) for v in self.values}
+        # Menu roles the member currently holds
+        current_ids = {r.id for r in member.roles} & self._menu_role_ids
 
-        # Remove all menu roles then add selected
-        roles_to_remove = [r for r in member.roles if r.id in menu_role_ids]
-        roles_to_add = [member.guild.get_role(rid) for rid in selected_ids]
-        roles_to_add = [r for r in roles_to_add if r is not None]
+        # Only touch roles whose state actually changes
+        to_remove_ids = current_ids - selected_ids
+        to_add_ids = selected_ids - current_ids
+        roles_to_remove = [r for r in member.roles if r.id in to_remove_ids]
+        get_role = member.guild.get_role
+        roles_to_add = [r for rid in to_add_ids if (r := get_role(rid)) is not None]
 
         try:
             # Remove first
@@ -124,7 +202,9 @@ class RolesSelect(discord.ui.Select):
             return
 
         if selected_ids:
-            chosen = ", ".join([r.name for r in roles_to_add])
+            chosen = ", ".join(
+                [r.name for rid in selected_ids if (r := get_role(rid)) is not None]
+            )
             await interaction.response.send_message(
                 f"Updated! You now have: **{chosen}**.", ephemeral=True
             )
@@ -137,8 +217,7 @@ class RolesSelect(discord.ui.Select):
 class RoleMenuView(discord.ui.View):
     def __init__(self, record: RoleMenuRecord, guild: discord.Guild):
         super().__init__(timeout=None)  # persistent
-        roles = [guild.get_role(rid) for rid in record.role_ids]
-        roles = [r for r in roles if r is not None]
+        roles = [r for rid in record.role_ids if (r := guild.get_role(rid)) is not None]
         self.add_item(RolesSelect(roles, multi=record.multi))
 
 
@@ -147,21 +226,42 @@ intents = discord.Intents.default()
 intents.message_content = False
 intents.members = True  # required for role management
 
-load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 if not TOKEN:
     raise SystemExit("DISCORD_TOKEN not found in environment (.env)")
 
-bot = commands.Bot(command_prefix=commands.when_mentioned_or("!"), intents=intents)
+class RoleMenuBot(commands.Bot):
+    async def close(self):
+        # Stop the debounced writer, let an in-flight save finish, then flush
+        # anything it hadn't saved yet
+        if _writer is not None:
+            _writer.cancel()
+        if _saving is not None and not _saving.done():
+            try:
+                await _saving
+            except Exception:
+                _dirty.set()  # the final flush below retries it
+        if _dirty.is_set():
+            try:
+                save_storage(storage)
+                _dirty.clear()
+            except Exception as e:
+                print(f"Saving role menus failed: {e}")
+        await super().close()
+
+
+bot = RoleMenuBot(command_prefix=commands.when_mentioned_or("!"), intents=intents)
 
-def record_key(guild_id: int, message_id: int) -> str:
-    return f"{guild_id}:{message_id}"
+# Message ids whose persistent view is already attached
+_registered: set[int] = set()
 
 
 @bot.event
 async def on_ready():
     # Re-attach persistent views for existing menus
     for key, rec in storage.items():
+        if rec.message_id in _registered:
+            continue
         guild = bot.get_guild(rec.guild_id)
         if guild is None:
             continue
@@ -169,16 +269,18 @@ async def on_ready():
         try:
             bot.add_view(view, message_id=rec.message_id)
         except Exception:
-            pass
+            continue
+        _registered.add(rec.message_id)
     print(f"Logged in as {bot.user} (ID: {bot.user.id})")
 
 
 # -------------- Helpers --------------
-ROLE_MENTION_RE = re.compile(r"<@&(?P<id>\d+)>")
+ROLE_MENTION_RE = re.compile(r"<@&(\d+)>")
+MESSAGE_LINK_RE = re.compile(r"/channels/(\d+)/(\d+)/(\d+)$")
 
 
 def parse_role_mentions(text: str) -> List[int]:
-    return [int(m.group("id")) for m in ROLE_MENTION_RE.finditer(text)]
+    return [int(s) for s in ROLE_MENTION_RE.findall(text)]
 
 
 # -------------- Slash Commands --------------
@@ -224,11 +326,13 @@ class RoleMenuGroup(app_commands.Group):
 
         # Validate roles are assignable
         resolved_roles: List[discord.Role] = []
+        me_top = me.top_role  # type: ignore
+        get_role = interaction.guild.get_role
         for rid in role_ids:
-            r = interaction.guild.get_role(rid)
+            r = get_role(rid)
             if r is None:
                 continue
-            if r >= interaction.guild.me.top_role:  # type: ignore
+            if r >= me_top:
                 await interaction.response.send_message(
                     f"Role **{r.name}** is higher or equal to my top role. Move me above it.",
                     ephemeral=True,
@@ -261,8 +365,9 @@ class RoleMenuGroup(app_commands.Group):
             role_ids=[r.id for r in resolved_roles],
             multi=bool(multi),
         )
-        storage[record_key(rec.guild_id, rec.message_id)] = rec
-        save_storage(storage)
+        storage[(rec.guild_id, rec.message_id)] = rec
+        _registered.add(rec.message_id)
+        mark_storage_dirty()
 
         await interaction.followup.send(
             f"Role menu created: {msg.jump_url}", ephemeral=True
@@ -275,7 +380,7 @@ class RoleMenuGroup(app_commands.Group):
             await interaction.response.send_message("Guild only.", ephemeral=True)
             return
 
-        m = re.search(r"/channels/(\d+)/(\d+)/(\d+)$", message_link)
+        m = MESSAGE_LINK_RE.search(message_link)
         if not m:
             await interaction.response.send_message("Invalid message link.", ephemeral=True)
             return
@@ -284,7 +389,7 @@ class RoleMenuGroup(app_commands.Group):
             await interaction.response.send_message("That message isn't in this server.", ephemeral=True)
             return
 
-        key = record_key(g_id, msg_id)
+        key = (g_id, msg_id)
         if key not in storage:
             await interaction.response.send_message("No role menu found for that message.", ephemeral=True)
             return
@@ -302,7 +407,8 @@ class RoleMenuGroup(app_commands.Group):
 
         # Remove from storage
         storage.pop(key, None)
-        save_storage(storage)
+        _registered.discard(msg_id)
+        mark_storage_dirty()
         await interaction.response.send_message("Role menu removed.", ephemeral=True)
 
 
@@ -311,6 +417,16 @@ bot.tree.add_command(RoleMenuGroup())
 # Sync on startup for convenience (optional)
 @bot.event
 async def setup_hook():
+    global _writer
+    _writer = asyncio.create_task(_writer_task())
+    # Worker dynos stop with SIGTERM, which bot.run doesn't handle; close
+    # cleanly so pending menu changes get flushed
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, lambda: asyncio.create_task(bot.close())
+        )
+    except NotImplementedError:  # e.g. Windows event loops
+        pass
     # Global sync; you can change to per-guild for faster iteration
     try:
         await bot.tree.sync()